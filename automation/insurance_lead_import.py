@@ -12,28 +12,47 @@ Usage:
     python insurance_lead_import.py --source api --batch-id 12345
 
 Requirements:
-    pip install boto3 cryptography pandas psycopg2-binary requests
+    pip install blake3 boto3 cryptography msgspec psycopg2-binary requests
 """
 
 import os
-import json
+import io
+import csv
+import gzip
+import uuid
+import atexit
+import base64
 import hashlib
+import hmac
 import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from typing import ClassVar, Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
 import argparse
 
 # External dependencies (install with pip)
 try:
     import boto3
-    import pandas as pd
-    import psycopg2
+    from blake3 import blake3
+    import msgspec
+    from psycopg2.pool import ThreadedConnectionPool
+    from cryptography.exceptions import InvalidTag
     from cryptography.fernet import Fernet
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError as e:
     print(f"Missing dependency: {e}")
-    print("Install with: pip install boto3 cryptography pandas psycopg2-binary requests")
+    print("Install with: pip install blake3 boto3 cryptography msgspec psycopg2-binary requests")
     exit(1)
 
 # Configure logging
@@ -49,12 +68,35 @@ logger = logging.getLogger(__name__)
 
 # Constants
 ENCRYPTION_KEY = os.getenv('HIPAA_ENCRYPTION_KEY', Fernet.generate_key())
+# Keys the PII dedup hash; required (no random default), since dedup needs it stable across runs
+HASH_KEY = os.getenv('HIPAA_HASH_KEY')
 DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://localhost/wcag_platform')
 S3_BUCKET = os.getenv('INSURANCE_LEADS_BUCKET', 'wcag-insurance-leads')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
+LEAD_BATCH_SIZE = int(os.getenv('LEAD_BATCH_SIZE', '1000'))
+LEAD_ENCRYPT_WORKERS = int(os.getenv('LEAD_ENCRYPT_WORKERS', str(os.cpu_count() or 4)))
+# Batches buffered between pipeline stages
+LEAD_PIPELINE_DEPTH = int(os.getenv('LEAD_PIPELINE_DEPTH', '4'))
+# 'blake3' (default) or 'sha256' where a FIPS-approved digest is required
+PII_HASH_ALGORITHM = os.getenv('PII_HASH_ALGORITHM', 'blake3')
 
-@dataclass
-class InsuranceLead:
+# Marks the end of the stream on the pipeline queues
+_PIPELINE_DONE = object()
+
+# Column order used by the bulk COPY loader and its merge; keep in sync with _ensure_schema
+LEAD_COLUMNS = (
+    'lead_id', 'source', 'first_name', 'last_name', 'email', 'phone',
+    'date_of_birth', 'zip_code', 'state', 'coverage_type', 'household_income',
+    'health_conditions', 'current_coverage', 'preferred_contact_time', 'notes',
+    'created_at', 'imported_at', 'consent_given', 'tcpa_compliant'
+)
+# Stored alongside LEAD_COLUMNS but not part of the lead, so it never reaches S3
+STORED_COLUMNS = LEAD_COLUMNS + ('email_hash',)
+# Required text fields: COPY CSV reads unquoted empty values as NULL, so these
+# are forced to '' to match what per-row INSERTs stored
+NOT_NULL_COLUMNS = ('lead_id', 'source', 'first_name', 'last_name', 'email', 'phone')
+
+class InsuranceLead(msgspec.Struct, gc=False):
     """Insurance lead data structure with HIPAA-sensitive fields"""
     lead_id: str
     source: str  # facebook, google, referral, aged_lead
@@ -71,50 +113,191 @@ class InsuranceLead:
     current_coverage: Optional[bool] = None
     preferred_contact_time: Optional[str] = None
     notes: Optional[str] = None
-    created_at: str = datetime.now(timezone.utc).isoformat()
-    imported_at: str = datetime.now(timezone.utc).isoformat()
+    created_at: datetime = msgspec.field(default_factory=lambda: datetime.now(timezone.utc))
+    imported_at: datetime = msgspec.field(default_factory=lambda: datetime.now(timezone.utc))
     consent_given: bool = False
     tcpa_compliant: bool = False
     
+    HIPAA_FIELDS: ClassVar[Tuple[str, ...]] = (
+        'date_of_birth',
+        'household_income',
+        'health_conditions',
+        'phone',
+        'email'
+    )
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
-        return asdict(self)
-    
-    def get_hipaa_fields(self) -> List[str]:
-        """Get list of HIPAA-protected fields"""
-        return [
-            'date_of_birth',
-            'household_income',
-            'health_conditions',
-            'phone',
-            'email'
-        ]
+        return msgspec.to_builtins(self)
+    
+    def get_hipaa_fields(self) -> Tuple[str, ...]:
+        """Get HIPAA-protected fields"""
+        return self.HIPAA_FIELDS
 
 
 class HIPAACompliantEncryption:
     """HIPAA-compliant encryption for sensitive data"""
     
-    def __init__(self, key: bytes = ENCRYPTION_KEY):
+    def __init__(self, key: bytes = ENCRYPTION_KEY, hash_key: Optional[bytes] = HASH_KEY,
+                 hash_algorithm: str = PII_HASH_ALGORITHM):
         if isinstance(key, str):
             key = key.encode()
-        self.cipher = Fernet(key)
+        if not hash_key:
+            raise ValueError("HIPAA_HASH_KEY is not set; email deduplication needs a stable hash key")
+        if hash_algorithm not in ('blake3', 'sha256'):
+            raise ValueError(f"Unsupported PII hash algorithm: {hash_algorithm}")
+        self.hash_algorithm = hash_algorithm
+        self._hash_key = base64.urlsafe_b64decode(hash_key)
+        if len(self._hash_key) != 32:
+            raise ValueError("HIPAA_HASH_KEY must be 32 bytes, url-safe base64 encoded")
+        if self._hash_key == base64.urlsafe_b64decode(key):
+            raise ValueError("HIPAA_HASH_KEY must differ from HIPAA_ENCRYPTION_KEY")
+        # Derive a dedicated AES-256 key; the raw key bytes stay Fernet-only
+        aes_key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'wcag-insurance-leads/aes-256-gcm'
+        ).derive(base64.urlsafe_b64decode(key))
+        self.aead = AESGCM(aes_key)
+        # Kept only to read values written before the switch to AES-GCM
+        self.legacy_cipher = Fernet(key)
         logger.info("Initialized HIPAA encryption")
     
     def encrypt(self, data: str) -> str:
-        """Encrypt sensitive data"""
+        """Encrypt sensitive data (AES-256-GCM, random 96-bit nonce prepended)"""
         if not data:
             return ""
-        return self.cipher.encrypt(data.encode()).decode()
+        nonce = os.urandom(12)
+        return base64.b64encode(nonce + self.aead.encrypt(nonce, data.encode(), None)).decode()
+    
+    def encrypt_batch(self, plaintexts: List[str]) -> List[str]:
+        """Encrypt many values in one pass, drawing all nonces up front"""
+        nonces = os.urandom(12 * len(plaintexts))
+        aead_encrypt = self.aead.encrypt
+        b64encode = base64.b64encode
+        
+        ciphertexts = []
+        for offset, data in zip(range(0, len(nonces), 12), plaintexts):
+            if not data:
+                ciphertexts.append("")
+                continue
+            nonce = nonces[offset:offset + 12]
+            ciphertexts.append(b64encode(nonce + aead_encrypt(nonce, data.encode(), None)).decode())
+        return ciphertexts
     
     def decrypt(self, encrypted_data: str) -> str:
-        """Decrypt sensitive data"""
+        """Decrypt sensitive data (AES-GCM, falling back to legacy Fernet tokens)"""
         if not encrypted_data:
             return ""
-        return self.cipher.decrypt(encrypted_data.encode()).decode()
+        try:
+            raw = base64.b64decode(encrypted_data, validate=True)
+            return self.aead.decrypt(raw[:12], raw[12:], None).decode()
+        except (InvalidTag, ValueError):
+            return self.legacy_cipher.decrypt(encrypted_data.encode()).decode()
     
-    def hash_pii(self, data: str) -> str:
-        """Create one-way hash for PII (for deduplication)"""
-        return hashlib.sha256(data.encode()).hexdigest()
+    def hash_pii(self, data: Union[str, bytes]) -> str:
+        """Create keyed one-way hash for PII (for deduplication)"""
+        if isinstance(data, str):
+            data = data.encode()
+        if self.hash_algorithm == 'blake3':
+            return blake3(data, key=self._hash_key).hexdigest()
+        return hmac.new(self._hash_key, data, hashlib.sha256).hexdigest()
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that holds back requests to a host after it signals a rate limit
+    
+    Honors Retry-After and X-RateLimit-Remaining/X-RateLimit-Reset, so concurrent
+    callers wait out the window instead of each collecting its own 429. 429s are
+    retried here rather than by urllib3, which would consume them before the
+    adapter could record the cooldown.
+    """
+    
+    def __init__(self, *args, rate_limit_retries: int = 3, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limit_retries = rate_limit_retries
+        self._lock = threading.Lock()
+        self._blocked_until: Dict[str, float] = {}
+    
+    def send(self, request, **kwargs):
+        host = urlparse(request.url).netloc
+        
+        for attempt in range(self.rate_limit_retries + 1):
+            with self._lock:
+                wait_seconds = self._blocked_until.get(host, 0.0) - time.monotonic()
+            if wait_seconds > 0:
+                logger.info(f"Rate limited by {host}, waiting {wait_seconds:.1f}s")
+                time.sleep(wait_seconds)
+            
+            response = super().send(request, **kwargs)
+            
+            delay = self._rate_limit_delay(response)
+            if response.status_code == 429:
+                # Exponential backoff when the host gives no usable hint
+                delay = max(delay, 0.5 * 2 ** attempt)
+            if delay > 0:
+                with self._lock:
+                    self._blocked_until[host] = max(
+                        self._blocked_until.get(host, 0.0),
+                        time.monotonic() + delay
+                    )
+            
+            if response.status_code != 429 or attempt == self.rate_limit_retries:
+                return response
+            response.close()
+    
+    def _rate_limit_delay(self, response: requests.Response) -> float:
+        """Seconds to hold off the host, based on its rate-limit headers"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            if retry_after.isdigit():
+                return float(retry_after)
+            try:
+                return (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+        
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            reset = response.headers.get('X-RateLimit-Reset', '')
+            try:
+                reset_value = float(reset)
+            except ValueError:
+                return 1.0
+            # Providers send either an epoch timestamp or seconds remaining
+            return reset_value - time.time() if reset_value > 1e9 else reset_value
+        
+        return 0.0
+
+
+def create_http_session() -> requests.Session:
+    """Create a pooled, rate-limit-aware HTTP session with retry/backoff"""
+    session = requests.Session()
+    adapter = RateLimitedAdapter(
+        pool_connections=16,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            # 429/Retry-After is left to RateLimitedAdapter; urllib3 would
+            # otherwise retry it internally regardless of status_forcelist
+            respect_retry_after_header=False
+        )
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class AuditEvent(msgspec.Struct):
+    """Single compliance audit record"""
+    timestamp: datetime
+    event_type: str
+    lead_id: str
+    details: Dict[str, Any]
+    user: str
+    ip_address: str
 
 
 class AuditLogger:
@@ -122,29 +305,47 @@ class AuditLogger:
     
     def __init__(self):
         self.log_file = '/tmp/insurance_lead_audit.jsonl'
+        self._json_encoder = msgspec.json.Encoder()
+        # BufferedWriter is internally locked, so pipeline stages can log concurrently
+        self._fh = open(self.log_file, 'ab', buffering=1 << 20)
+        atexit.register(self.close)
+        # Resolved once per process; the public IP does not change mid-run
+        self.ip_address = self._get_ip_address()
         logger.info(f"Audit logging to {self.log_file}")
     
+    def flush(self):
+        """Flush buffered audit events to disk"""
+        if not self._fh.closed:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+    
+    def close(self):
+        """Flush and close the audit log"""
+        if not self._fh.closed:
+            self.flush()
+            self._fh.close()
+    
     def log_event(self, event_type: str, lead_id: str, details: Dict[str, Any]):
         """Log compliance event"""
-        event = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
-            'event_type': event_type,
-            'lead_id': lead_id,
-            'details': details,
-            'user': os.getenv('USER', 'system'),
-            'ip_address': self._get_ip_address()
-        }
+        event = AuditEvent(
+            timestamp=datetime.now(timezone.utc),
+            event_type=event_type,
+            lead_id=lead_id,
+            details=details,
+            user=os.getenv('USER', 'system'),
+            ip_address=self.ip_address
+        )
         
-        with open(self.log_file, 'a') as f:
-            f.write(json.dumps(event) + '\n')
+        self._fh.write(self._json_encoder.encode(event) + b'\n')
         
         logger.info(f"Audit: {event_type} for lead {lead_id}")
     
     def _get_ip_address(self) -> str:
         """Get current IP address for audit trail"""
         try:
+            # Single attempt, no retrying session: 'unknown' beats stalling startup
             return requests.get('https://api.ipify.org', timeout=2).text
-        except:
+        except requests.RequestException:
             return 'unknown'
 
 
@@ -153,10 +354,25 @@ class LeadImporter:
     
     def __init__(self):
         self.encryption = HIPAACompliantEncryption()
+        self.session = create_http_session()
         self.audit = AuditLogger()
         self.s3_client = boto3.client('s3', region_name=AWS_REGION)
+        self.pool = ThreadedConnectionPool(1, 8, DATABASE_URL)
+        self.encrypt_pool = ThreadPoolExecutor(max_workers=LEAD_ENCRYPT_WORKERS)
+        self.s3_pool = ThreadPoolExecutor(max_workers=32)
+        self._json_encoder = msgspec.json.Encoder()
+        self._ensure_schema()
+        self.seen_email_hashes = self._load_email_hashes()
         logger.info("Initialized LeadImporter")
     
+    def close(self):
+        """Release pooled database/HTTP connections, worker pools and the audit log"""
+        self.encrypt_pool.shutdown(wait=True)
+        self.s3_pool.shutdown(wait=True)
+        self.pool.closeall()
+        self.session.close()
+        self.audit.close()
+    
     def import_from_facebook(self, date: str) -> List[InsuranceLead]:
         """Import leads from Facebook Lead Ads"""
         logger.info(f"Importing Facebook leads for date: {date}")
@@ -174,7 +390,7 @@ class LeadImporter:
         headers = {'Authorization': f'Bearer {access_token}'}
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10)
             response.raise_for_status()
             fb_data = response.json()
             
@@ -186,38 +402,36 @@ class LeadImporter:
             logger.error(f"Facebook import failed: {e}")
             return []
     
-    def import_from_csv(self, file_path: str) -> List[InsuranceLead]:
-        """Import leads from CSV file"""
+    def import_from_csv(self, file_path: str) -> Iterator[InsuranceLead]:
+        """Stream leads from CSV file"""
         logger.info(f"Importing leads from CSV: {file_path}")
+        parsed = 0
         
         try:
-            df = pd.read_csv(file_path)
-            leads = []
-            
-            for _, row in df.iterrows():
-                lead = InsuranceLead(
-                    lead_id=str(row.get('lead_id', self._generate_lead_id())),
-                    source='csv',
-                    first_name=row['first_name'],
-                    last_name=row['last_name'],
-                    email=row['email'],
-                    phone=row['phone'],
-                    date_of_birth=row.get('dob'),
-                    zip_code=row.get('zip'),
-                    state=row.get('state'),
-                    coverage_type=row.get('coverage_type'),
-                    notes=row.get('notes'),
-                    consent_given=bool(row.get('consent', False)),
-                    tcpa_compliant=bool(row.get('tcpa_consent', False))
-                )
-                leads.append(lead)
+            with open(file_path, newline='') as f:
+                for row in csv.DictReader(f):
+                    yield InsuranceLead(
+                        lead_id=row.get('lead_id') or self._generate_lead_id(),
+                        source='csv',
+                        first_name=row['first_name'],
+                        last_name=row['last_name'],
+                        email=row['email'],
+                        phone=row['phone'],
+                        date_of_birth=row.get('dob') or None,
+                        zip_code=row.get('zip') or None,
+                        state=row.get('state') or None,
+                        coverage_type=row.get('coverage_type') or None,
+                        notes=row.get('notes') or None,
+                        consent_given=self._parse_bool(row.get('consent')),
+                        tcpa_compliant=self._parse_bool(row.get('tcpa_consent'))
+                    )
+                    parsed += 1
             
-            logger.info(f"Parsed {len(leads)} leads from CSV")
-            return leads
+            logger.info(f"Parsed {parsed} leads from CSV")
             
         except Exception as e:
-            logger.error(f"CSV import failed: {e}")
-            return []
+            logger.error(f"CSV import failed after {parsed} leads: {e}")
+            raise
     
     def import_from_api(self, batch_id: str) -> List[InsuranceLead]:
         """Import leads from third-party aged lead provider API"""
@@ -233,7 +447,7 @@ class LeadImporter:
         try:
             url = f"{api_url}/batches/{batch_id}/leads"
             headers = {'Authorization': f'Bearer {api_key}'}
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10)
             response.raise_for_status()
             
             api_data = response.json()
@@ -245,13 +459,54 @@ class LeadImporter:
             logger.error(f"API import failed: {e}")
             return []
     
-    def process_leads(self, leads: List[InsuranceLead]) -> int:
-        """Process and store leads with encryption and audit logging"""
-        logger.info(f"Processing {len(leads)} leads")
-        processed_count = 0
+    def process_leads(self, leads: Iterable[InsuranceLead]) -> int:
+        """Process and store leads with encryption and audit logging
         
-        for lead in leads:
+        Runs as a streaming pipeline over bounded queues: this thread validates
+        and batches leads for the encrypt pool, a single writer thread COPYs each
+        encrypted batch into PostgreSQL and queues its S3 shards, and an archive
+        thread waits on the uploads and writes the audit trail. At most
+        LEAD_PIPELINE_DEPTH batches are buffered between stages.
+        """
+        logger.info("Processing leads")
+        encrypted_queue = queue.Queue(maxsize=LEAD_PIPELINE_DEPTH)
+        archived_queue = queue.Queue(maxsize=LEAD_PIPELINE_DEPTH)
+        
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='lead-pipeline') as stages:
+            archive_stage = stages.submit(self._archive_stage, archived_queue)
+            store_stage = stages.submit(self._store_stage, encrypted_queue, archived_queue, archive_stage)
             try:
+                total_count = self._produce_batches(leads, encrypted_queue, store_stage)
+                self._put(encrypted_queue, _PIPELINE_DONE, store_stage)
+                store_stage.result()
+                processed_count = archive_stage.result()
+            except BaseException as e:
+                # Let the live stages finish what is queued, then account for
+                # whatever a failed stage left behind; never mask the original error
+                if not store_stage.done():
+                    self._end_stream(encrypted_queue, store_stage)
+                wait([store_stage, archive_stage])
+                try:
+                    self._drain_pipeline(encrypted_queue, archived_queue, e)
+                except Exception as drain_error:
+                    logger.error(f"Could not account for queued lead batches: {drain_error}")
+                raise
+        
+        self.audit.flush()
+        logger.info(f"Successfully processed {processed_count}/{total_count} leads")
+        return processed_count
+    
+    def _produce_batches(self, leads: Iterable[InsuranceLead], encrypted_queue: queue.Queue,
+                         store_stage: Future) -> int:
+        """Pipeline stage 1: validate consent and submit lead batches for encryption"""
+        total_count = 0
+        batch = []
+        email_hashes = []  # parallel to batch, None for leads without an email
+        
+        try:
+            for lead in leads:
+                total_count += 1
+                
                 # Validate consent
                 if not lead.consent_given or not lead.tcpa_compliant:
                     logger.warning(f"Skipping lead {lead.lead_id}: missing consent")
@@ -262,58 +517,215 @@ class LeadImporter:
                     )
                     continue
                 
-                # Encrypt HIPAA-protected fields
-                encrypted_lead = self._encrypt_lead(lead)
+                # Skip leads already imported, in this run or a previous one
+                email_hash = None
+                if lead.email:
+                    email_hash = self.encryption.hash_pii(lead.email.strip().lower())
+                    if email_hash in self.seen_email_hashes:
+                        logger.info(f"Skipping lead {lead.lead_id}: duplicate email")
+                        self.audit.log_event(
+                            'lead_rejected',
+                            lead.lead_id,
+                            {'reason': 'duplicate_email'}
+                        )
+                        continue
+                    self.seen_email_hashes.add(email_hash)
                 
-                # Store in database
-                self._store_lead(encrypted_lead)
-                
-                # Archive to S3
-                self._archive_to_s3(encrypted_lead)
-                
-                # Audit log
-                self.audit.log_event(
-                    'lead_imported',
-                    lead.lead_id,
-                    {
-                        'source': lead.source,
-                        'coverage_type': lead.coverage_type,
-                        'encrypted': True
-                    }
-                )
-                
-                processed_count += 1
+                batch.append(lead)
+                email_hashes.append(email_hash)
+                if len(batch) >= LEAD_BATCH_SIZE:
+                    self._submit_batch(encrypted_queue, batch, email_hashes, store_stage)
+                    batch = []
+                    email_hashes = []
+            
+            if batch:
+                self._submit_batch(encrypted_queue, batch, email_hashes, store_stage)
+            
+        except Exception as e:
+            if store_stage.done():
+                logger.error(f"Lead pipeline stopped after {total_count} leads: a later stage failed")
+            else:
+                logger.error(f"Lead source failed after {total_count} leads: {e}")
+            # Leads still in the unsubmitted batch were never stored
+            self._release_batch(batch, email_hashes, e)
+            raise
+        
+        return total_count
+    
+    def _submit_batch(self, encrypted_queue: queue.Queue, batch: List[InsuranceLead],
+                      email_hashes: List[Optional[str]], store_stage: Future):
+        """Hand a batch and its email hashes to the encrypt pool and the store stage"""
+        encrypted = self.encrypt_pool.submit(self._encrypt_leads, batch)
+        self._put(encrypted_queue, (batch, email_hashes, encrypted), store_stage)
+    
+    def _store_stage(self, encrypted_queue: queue.Queue, archived_queue: queue.Queue,
+                     archive_stage: Future):
+        """Pipeline stage 2: store encrypted batches in PostgreSQL and queue their S3 shards"""
+        try:
+            while (item := encrypted_queue.get()) is not _PIPELINE_DONE:
+                leads, email_hashes, encrypted = item
+                try:
+                    encrypted_leads = encrypted.result()
+                    
+                    # Store the whole batch in a single transaction
+                    self._store_leads_bulk(encrypted_leads, email_hashes)
+                except Exception as e:
+                    logger.error(f"Processing batch of {len(leads)} leads failed: {e}")
+                    self._release_batch(leads, email_hashes, e)
+                    continue
                 
-            except Exception as e:
-                logger.error(f"Failed to process lead {lead.lead_id}: {e}")
+                futures = {}
+                try:
+                    futures = self._submit_archive(encrypted_leads)
+                    self._put(archived_queue, (encrypted_leads, futures), archive_stage)
+                except Exception as e:
+                    # Already committed, so record the import before giving up
+                    if futures:
+                        self._audit_archived_batch(futures)
+                    else:
+                        self._audit_imported(encrypted_leads, None, e)
+                    raise
+        except BaseException as e:
+            logger.error(f"Lead pipeline store stage failed: {e}")
+            self._end_stream(archived_queue, archive_stage)
+            raise
+        self._put(archived_queue, _PIPELINE_DONE, archive_stage)
+    
+    def _archive_stage(self, archived_queue: queue.Queue) -> int:
+        """Pipeline stage 3: wait for S3 shard uploads and audit each imported lead"""
+        processed_count = 0
+        
+        try:
+            while (item := archived_queue.get()) is not _PIPELINE_DONE:
+                encrypted_leads, futures = item
+                self._audit_archived_batch(futures)
+                self.audit.flush()
+                processed_count += len(encrypted_leads)
+        except BaseException as e:
+            logger.error(f"Lead pipeline archive stage failed: {e}")
+            raise
+        
+        return processed_count
+    
+    def _audit_archived_batch(self, futures: Dict[Future, List[InsuranceLead]]):
+        """Wait for a stored batch's S3 shard uploads and audit its leads"""
+        wait(futures)
+        for future, shard_leads in futures.items():
+            error = future.exception()
+            self._audit_imported(shard_leads, None if error else future.result(), error)
+    
+    def _audit_imported(self, leads: List[InsuranceLead], key: Optional[str],
+                        error: Optional[BaseException]):
+        """Audit stored leads, with their shard key and line when the archive succeeded"""
+        for line, lead in enumerate(leads):
+            if error:
+                logger.warning(f"S3 archiving failed for {lead.lead_id}: {error}")
                 self.audit.log_event(
-                    'lead_import_failed',
+                    'lead_archive_failed',
                     lead.lead_id,
-                    {'error': str(e)}
+                    {'error': str(error)}
                 )
+            
+            # Audit log (shard key + line act as the lead's archive index)
+            self.audit.log_event(
+                'lead_imported',
+                lead.lead_id,
+                {
+                    'source': lead.source,
+                    'coverage_type': lead.coverage_type,
+                    'encrypted': True,
+                    'archive_key': key,
+                    'archive_line': None if error else line
+                }
+            )
+    
+    def _release_batch(self, leads: List[InsuranceLead], email_hashes: List[Optional[str]],
+                       error: BaseException):
+        """Audit a batch that was not stored and forget its hashes so a later run may import it"""
+        self.seen_email_hashes.difference_update(email_hashes)
+        for lead in leads:
+            self.audit.log_event(
+                'lead_import_failed',
+                lead.lead_id,
+                {'error': str(error)}
+            )
+    
+    def _drain_pipeline(self, encrypted_queue: queue.Queue, archived_queue: queue.Queue,
+                        error: BaseException):
+        """Account for batches still queued after a pipeline stage failed"""
+        for leads, email_hashes, encrypted in self._queued_items(encrypted_queue):
+            encrypted.cancel()
+            self._release_batch(leads, email_hashes, error)
         
-        logger.info(f"Successfully processed {processed_count}/{len(leads)} leads")
-        return processed_count
+        # These were already stored, so they count as imported
+        for _encrypted_leads, futures in self._queued_items(archived_queue):
+            self._audit_archived_batch(futures)
+        
+        self.audit.flush()
     
-    def _encrypt_lead(self, lead: InsuranceLead) -> InsuranceLead:
-        """Encrypt HIPAA-protected fields"""
-        encrypted_lead = InsuranceLead(**lead.to_dict())
+    def _queued_items(self, stage_queue: queue.Queue) -> Iterator[Any]:
+        """Take whatever is left on a pipeline queue whose consumer has stopped"""
+        while True:
+            try:
+                item = stage_queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _PIPELINE_DONE:
+                yield item
+    
+    def _submit_archive(self, encrypted_leads: List[InsuranceLead]) -> Dict[Future, List[InsuranceLead]]:
+        """Upload leads to S3 as one NDJSON shard per (source, date), concurrently"""
+        shards = defaultdict(list)
+        for lead in encrypted_leads:
+            shards[(lead.source, lead.created_at.date().isoformat())].append(lead)
         
-        for field in lead.get_hipaa_fields():
-            value = getattr(encrypted_lead, field)
-            if value:
-                encrypted_value = self.encryption.encrypt(str(value))
-                setattr(encrypted_lead, field, encrypted_value)
+        return {
+            self.s3_pool.submit(self._archive_to_s3, source, date, shard_leads): shard_leads
+            for (source, date), shard_leads in shards.items()
+        }
+    
+    def _end_stream(self, stage_queue: queue.Queue, consumer: Future):
+        """Signal the end of the stream while unwinding, without masking the error"""
+        try:
+            self._put(stage_queue, _PIPELINE_DONE, consumer)
+        except Exception as e:
+            logger.error(f"Lead pipeline shutdown failed: {e}")
+    
+    def _put(self, stage_queue: queue.Queue, item: Any, consumer: Future):
+        """Put onto a bounded pipeline queue without hanging if its consumer has died"""
+        while True:
+            try:
+                stage_queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                if consumer.done():
+                    consumer.result()
+                    raise RuntimeError("Lead pipeline stage exited early")
+    
+    def _encrypt_leads(self, leads: List[InsuranceLead]) -> List[InsuranceLead]:
+        """Encrypt HIPAA-protected fields, one column at a time across the batch"""
+        encrypted_leads = [msgspec.structs.replace(lead) for lead in leads]
+        
+        for field in InsuranceLead.HIPAA_FIELDS:
+            targets = []
+            plaintexts = []
+            for lead in encrypted_leads:
+                value = getattr(lead, field)
+                if value:
+                    targets.append(lead)
+                    plaintexts.append(str(value))
+            
+            for lead, ciphertext in zip(targets, self.encryption.encrypt_batch(plaintexts)):
+                setattr(lead, field, ciphertext)
         
-        return encrypted_lead
+        return encrypted_leads
     
-    def _store_lead(self, lead: InsuranceLead):
-        """Store lead in PostgreSQL database"""
-        conn = psycopg2.connect(DATABASE_URL)
+    def _ensure_schema(self):
+        """Create the leads table if it does not exist yet"""
+        conn = self.pool.getconn()
         cursor = conn.cursor()
         
         try:
-            # Create table if not exists
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS insurance_leads (
                     lead_id VARCHAR(255) PRIMARY KEY,
@@ -334,47 +746,102 @@ class LeadImporter:
                     created_at TIMESTAMP,
                     imported_at TIMESTAMP,
                     consent_given BOOLEAN,
-                    tcpa_compliant BOOLEAN
+                    tcpa_compliant BOOLEAN,
+                    email_hash VARCHAR(64)
                 )
             """)
+            # Tables created before email deduplication lack the hash column
+            cursor.execute("""
+                ALTER TABLE insurance_leads ADD COLUMN IF NOT EXISTS email_hash VARCHAR(64)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS insurance_leads_email_hash_idx
+                ON insurance_leads (email_hash)
+            """)
+            conn.commit()
             
-            # Insert lead (with ON CONFLICT to avoid duplicates)
+        finally:
+            cursor.close()
+            self.pool.putconn(conn)
+    
+    def _load_email_hashes(self) -> set:
+        """Load email hashes of already-imported leads for deduplication"""
+        conn = self.pool.getconn()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT email_hash FROM insurance_leads WHERE email_hash IS NOT NULL")
+            email_hashes = {row[0] for row in cursor}
+            conn.commit()
+            logger.info(f"Loaded {len(email_hashes)} known email hashes")
+            return email_hashes
+            
+        finally:
+            cursor.close()
+            self.pool.putconn(conn)
+    
+    def _store_leads_bulk(self, leads: List[InsuranceLead], email_hashes: List[Optional[str]]):
+        """Store a batch of leads and their email hashes in PostgreSQL with a single COPY"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for lead, email_hash in zip(leads, email_hashes):
+            writer.writerow([getattr(lead, column) for column in LEAD_COLUMNS] + [email_hash])
+        buffer.seek(0)
+        
+        columns = ', '.join(STORED_COLUMNS)
+        not_null_columns = ', '.join(NOT_NULL_COLUMNS)
+        conn = self.pool.getconn()
+        cursor = conn.cursor()
+        
+        try:
+            # COPY into a staging table, then merge so ON CONFLICT still applies
             cursor.execute("""
-                INSERT INTO insurance_leads VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                )
+                CREATE TEMP TABLE insurance_leads_staging
+                (LIKE insurance_leads INCLUDING DEFAULTS) ON COMMIT DROP
+            """)
+            cursor.copy_expert(
+                f"COPY insurance_leads_staging ({columns}) FROM STDIN "
+                f"WITH (FORMAT csv, FORCE_NOT_NULL ({not_null_columns}))",
+                buffer
+            )
+            # DISTINCT ON guards against the same lead_id twice in one batch
+            cursor.execute(f"""
+                INSERT INTO insurance_leads ({columns})
+                SELECT DISTINCT ON (lead_id) {columns} FROM insurance_leads_staging
                 ON CONFLICT (lead_id) DO UPDATE SET
                     imported_at = EXCLUDED.imported_at
-            """, (
-                lead.lead_id, lead.source, lead.first_name, lead.last_name,
-                lead.email, lead.phone, lead.date_of_birth, lead.zip_code,
-                lead.state, lead.coverage_type, lead.household_income,
-                lead.health_conditions, lead.current_coverage,
-                lead.preferred_contact_time, lead.notes, lead.created_at,
-                lead.imported_at, lead.consent_given, lead.tcpa_compliant
-            ))
+            """)
             
             conn.commit()
-            logger.debug(f"Stored lead {lead.lead_id} in database")
+            logger.debug(f"Stored {len(leads)} leads in database")
+            
+        except Exception:
+            conn.rollback()
+            raise
             
         finally:
             cursor.close()
-            conn.close()
+            self.pool.putconn(conn)
     
-    def _archive_to_s3(self, lead: InsuranceLead):
-        """Archive encrypted lead to S3 for long-term storage"""
-        key = f"leads/{lead.source}/{lead.created_at[:10]}/{lead.lead_id}.json"
+    def _archive_to_s3(self, source: str, date: str, leads: List[InsuranceLead]) -> str:
+        """Archive encrypted leads to S3 as a gzipped NDJSON shard, returning its key"""
+        key = f"leads/{source}/{date}/batch-{uuid.uuid4().hex}.ndjson.gz"
         
-        try:
-            self.s3_client.put_object(
-                Bucket=S3_BUCKET,
-                Key=key,
-                Body=json.dumps(lead.to_dict()),
-                ServerSideEncryption='AES256'
-            )
-            logger.debug(f"Archived lead {lead.lead_id} to S3")
-        except Exception as e:
-            logger.warning(f"S3 archiving failed for {lead.lead_id}: {e}")
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as shard:
+            # msgspec encodes the lead structs directly, no to_dict() round trip
+            shard.write(self._json_encoder.encode_lines(leads))
+        
+        self.s3_client.put_object(
+            Bucket=S3_BUCKET,
+            Key=key,
+            Body=buffer.getvalue(),
+            ContentType='application/x-ndjson',
+            ContentEncoding='gzip',
+            ServerSideEncryption='AES256'
+        )
+        logger.debug(f"Archived {len(leads)} leads to s3://{S3_BUCKET}/{key}")
+        return key
     
     def _parse_facebook_leads(self, fb_data: Dict) -> List[InsuranceLead]:
         """Parse Facebook lead data format"""
@@ -386,6 +853,10 @@ class LeadImporter:
         # Placeholder - implement based on actual API response
         return []
     
+    def _parse_bool(self, value: Optional[str]) -> bool:
+        """Parse a CSV consent flag such as 'true', 'yes' or '1'"""
+        return (value or '').strip().lower() in ('1', 'true', 'yes', 'y')
+    
     def _generate_lead_id(self) -> str:
         """Generate unique lead ID"""
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
@@ -405,31 +876,34 @@ def main():
     args = parser.parse_args()
     
     importer = LeadImporter()
-    leads = []
-    
-    if args.source == 'facebook':
-        if not args.date:
-            logger.error("--date required for Facebook import")
-            return
-        leads = importer.import_from_facebook(args.date)
-    
-    elif args.source == 'csv':
-        if not args.file:
-            logger.error("--file required for CSV import")
-            return
-        leads = importer.import_from_csv(args.file)
-    
-    elif args.source == 'api':
-        if not args.batch_id:
-            logger.error("--batch-id required for API import")
-            return
-        leads = importer.import_from_api(args.batch_id)
-    
-    if leads:
+    try:
+        leads: Iterable[InsuranceLead] = []
+        
+        if args.source == 'facebook':
+            if not args.date:
+                logger.error("--date required for Facebook import")
+                return
+            leads = importer.import_from_facebook(args.date)
+        
+        elif args.source == 'csv':
+            if not args.file:
+                logger.error("--file required for CSV import")
+                return
+            leads = importer.import_from_csv(args.file)
+        
+        elif args.source == 'api':
+            if not args.batch_id:
+                logger.error("--batch-id required for API import")
+                return
+            leads = importer.import_from_api(args.batch_id)
+        
         count = importer.process_leads(leads)
-        logger.info(f"Import complete: {count} leads processed")
-    else:
-        logger.warning("No leads imported")
+        if count:
+            logger.info(f"Import complete: {count} leads processed")
+        else:
+            logger.warning("No leads imported")
+    finally:
+        importer.close()
 
 
 if __name__ == '__main__':
@@ -12,24 +12,31 @@ Usage:
     python music_metadata_sync.py --generate-accessible-descriptions
 
 Requirements:
-    pip install spotipy requests anthropic
+    pip install aiohttp "aiohttp-client-cache[sqlite]" msgspec requests-cache spotipy anthropic
 """
 
 import os
 import json
+import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import argparse
 
 try:
+    import aiohttp
+    from aiohttp_client_cache import CachedSession, SQLiteBackend
+    import aiosqlite  # noqa: F401  SQLiteBackend needs it, but only imports it lazily
+    import msgspec
+    import requests_cache
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     import spotipy
     from spotipy.oauth2 import SpotifyClientCredentials
-    import requests
-    from anthropic import Anthropic
+    from anthropic import AsyncAnthropic
 except ImportError as e:
     print(f"Missing dependency: {e}")
-    print("Install with: pip install spotipy requests anthropic")
+    print("Install with: pip install aiohttp 'aiohttp-client-cache[sqlite]' msgspec requests-cache spotipy anthropic")
     import sys; sys.exit(1)
 
 # Configure logging
@@ -45,14 +52,117 @@ SPOTIFY_CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET')
 LASTFM_API_KEY = os.getenv('LASTFM_API_KEY')
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
 
+# Model and Message Batches polling for accessible descriptions
+DESCRIPTION_MODEL = 'claude-3-haiku-20240307'
+BATCH_POLL_INTERVAL = int(os.getenv('ANTHROPIC_BATCH_POLL_INTERVAL', '30'))
+
+# Retries for rate-limited or transiently failing API calls
+API_MAX_RETRIES = int(os.getenv('MUSIC_API_MAX_RETRIES', '3'))
+
+# On-disk response cache for repeat syncs of the same artist
+MUSIC_CACHE_PATH = os.getenv('MUSIC_CACHE_PATH', 'music_cache')
+MUSIC_CACHE_TTL = int(os.getenv('MUSIC_CACHE_TTL', '86400'))
+
+# Response schemas (only the fields we read; unknown fields are ignored)
+class SpotifyImage(msgspec.Struct):
+    url: str
+
+class SpotifyFollowers(msgspec.Struct):
+    total: int = 0
+
+class SpotifyArtist(msgspec.Struct):
+    name: str
+    id: str
+    genres: List[str] = []
+    popularity: int = 0
+    followers: SpotifyFollowers = msgspec.field(default_factory=SpotifyFollowers)
+    images: List[SpotifyImage] = []
+
+class SpotifyArtistPage(msgspec.Struct):
+    items: List[SpotifyArtist] = []
+
+class SpotifySearchResponse(msgspec.Struct):
+    artists: SpotifyArtistPage
+
+class SpotifyTrack(msgspec.Struct):
+    name: str
+    id: str
+    duration_ms: int
+    popularity: int = 0
+    preview_url: Optional[str] = None
+
+class SpotifyTopTracksResponse(msgspec.Struct):
+    tracks: List[SpotifyTrack] = []
+
+class SpotifyAlbum(msgspec.Struct):
+    name: str
+    id: str
+    release_date: str
+    total_tracks: int
+
+class SpotifyAlbumPage(msgspec.Struct):
+    items: List[SpotifyAlbum] = []
+
+class LastfmImage(msgspec.Struct):
+    text: str = msgspec.field(name='#text', default='')
+
+class LastfmStats(msgspec.Struct):
+    # Last.fm sends counts as strings
+    listeners: Union[int, str] = 0
+    playcount: Union[int, str] = 0
+
+class LastfmBio(msgspec.Struct):
+    summary: str = ''
+
+class LastfmTag(msgspec.Struct):
+    name: str
+
+class LastfmTags(msgspec.Struct):
+    tag: List[LastfmTag] = []
+
+class LastfmArtist(msgspec.Struct):
+    name: str
+    mbid: Optional[str] = None
+    stats: LastfmStats = msgspec.field(default_factory=LastfmStats)
+    bio: LastfmBio = msgspec.field(default_factory=LastfmBio)
+    tags: LastfmTags = msgspec.field(default_factory=LastfmTags)
+    image: List[LastfmImage] = []
+
+class LastfmArtistResponse(msgspec.Struct):
+    artist: Optional[LastfmArtist] = None
+
+_lastfm_decoder = msgspec.json.Decoder(LastfmArtistResponse)
+
 class MusicMetadataSync:
     """Sync music metadata across platforms with AI enhancement"""
     
     def __init__(self):
         self.spotify = self._init_spotify()
-        self.anthropic = Anthropic(api_key=ANTHROPIC_API_KEY) if ANTHROPIC_API_KEY else None
+        # The SDK backs off on 429/5xx itself and honors retry-after headers
+        self.anthropic = (
+            AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=API_MAX_RETRIES)
+            if ANTHROPIC_API_KEY else None
+        )
+        self._session: Optional[CachedSession] = None
         logger.info("Initialized MusicMetadataSync")
     
+    def _get_session(self) -> CachedSession:
+        """Get the shared, disk-cached HTTP session (created inside the running event loop)"""
+        if self._session is None or self._session.closed:
+            self._session = CachedSession(
+                cache=SQLiteBackend(f'{MUSIC_CACHE_PATH}_lastfm', expire_after=MUSIC_CACHE_TTL),
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=16),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session and AI client"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        if self.anthropic:
+            await self.anthropic.close()
+    
     def _init_spotify(self):
         """Initialize Spotify API client"""
         if not SPOTIFY_CLIENT_ID or not SPOTIFY_CLIENT_SECRET:
@@ -63,9 +173,38 @@ class MusicMetadataSync:
             client_id=SPOTIFY_CLIENT_ID,
             client_secret=SPOTIFY_CLIENT_SECRET
         )
-        return spotipy.Spotify(auth_manager=auth_manager)
+        cached_session = requests_cache.CachedSession(
+            f'{MUSIC_CACHE_PATH}_spotify',
+            backend='sqlite',
+            expire_after=MUSIC_CACHE_TTL
+        )
+        # spotipy only mounts its own retrying adapter on sessions it creates
+        cached_session.mount('https://', HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=API_MAX_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=[429, 502, 503, 504]
+            )
+        ))
+        return spotipy.Spotify(auth_manager=auth_manager, requests_session=cached_session)
+    
+    async def _get_with_backoff(self, url: str, params: Dict) -> bytes:
+        """GET a URL on the shared session, backing off on rate limits and transient errors"""
+        for attempt in range(API_MAX_RETRIES + 1):
+            async with self._get_session().get(url, params=params) as response:
+                if response.status not in (429, 502, 503, 504) or attempt == API_MAX_RETRIES:
+                    response.raise_for_status()
+                    return await response.read()
+                
+                retry_after = response.headers.get('Retry-After', '')
+                delay = float(retry_after) if retry_after.isdigit() else 0.5 * 2 ** attempt
+                logger.warning("HTTP %d from %s, retrying in %.1fs", response.status, response.url.host, delay)
+            
+            await asyncio.sleep(delay)
     
-    def fetch_spotify_metadata(self, artist_name: str) -> Dict:
+    async def fetch_spotify_metadata(self, artist_name: str) -> Dict:
         """Fetch metadata from Spotify"""
         if not self.spotify:
             return {}
@@ -73,51 +212,39 @@ class MusicMetadataSync:
         logger.info("Fetching Spotify metadata for: %s", artist_name)
         
         try:
-            # Search for artist
-            results = self.spotify.search(q=f'artist:{artist_name}', type='artist', limit=1)
-            if not results['artists']['items']:
+            # Search for artist (spotipy is blocking, so run it off the event loop)
+            results = await asyncio.to_thread(
+                self.spotify.search, q=f'artist:{artist_name}', type='artist', limit=1
+            )
+            # spotipy hands back parsed JSON, so validate it into typed structs
+            results = msgspec.convert(results, type=SpotifySearchResponse)
+            if not results.artists.items:
                 logger.warning("Artist not found: %s", artist_name)
                 return {}
             
-            artist = results['artists']['items'][0]
-            artist_id = artist['id']
-            
-            # Get top tracks
-            top_tracks = self.spotify.artist_top_tracks(artist_id)
+            artist = results.artists.items[0]
             
-            # Get albums
-            albums = self.spotify.artist_albums(artist_id, limit=10)
+            # Get top tracks and albums
+            top_tracks, albums = await asyncio.gather(
+                asyncio.to_thread(self.spotify.artist_top_tracks, artist.id),
+                asyncio.to_thread(self.spotify.artist_albums, artist.id, limit=10),
+            )
+            top_tracks = msgspec.convert(top_tracks, type=SpotifyTopTracksResponse)
+            albums = msgspec.convert(albums, type=SpotifyAlbumPage)
             
             metadata = {
                 'platform': 'spotify',
                 'artist': {
-                    'name': artist['name'],
-                    'id': artist_id,
-                    'genres': artist['genres'],
-                    'popularity': artist['popularity'],
-                    'followers': artist['followers']['total'],
-                    'image': artist['images'][0]['url'] if artist['images'] else None,
+                    'name': artist.name,
+                    'id': artist.id,
+                    'genres': artist.genres,
+                    'popularity': artist.popularity,
+                    'followers': artist.followers.total,
+                    'image': artist.images[0].url if artist.images else None,
                 },
-                'top_tracks': [
-                    {
-                        'name': track['name'],
-                        'id': track['id'],
-                        'duration_ms': track['duration_ms'],
-                        'popularity': track['popularity'],
-                        'preview_url': track['preview_url'],
-                    }
-                    for track in top_tracks['tracks'][:5]
-                ],
-                'albums': [
-                    {
-                        'name': album['name'],
-                        'id': album['id'],
-                        'release_date': album['release_date'],
-                        'total_tracks': album['total_tracks'],
-                    }
-                    for album in albums['items']
-                ],
-                'fetched_at': datetime.now(datetime.timezone.utc).isoformat(),
+                'top_tracks': [msgspec.to_builtins(track) for track in top_tracks.tracks[:5]],
+                'albums': [msgspec.to_builtins(album) for album in albums.items],
+                'fetched_at': datetime.now(timezone.utc).isoformat(),
             }
             
             logger.info("Fetched Spotify data: %d tracks, %d albums", len(metadata['top_tracks']), len(metadata['albums']))
@@ -127,7 +254,7 @@ class MusicMetadataSync:
             logger.error("Spotify API error: %s", e)
             return {}
     
-    def fetch_lastfm_metadata(self, artist_name: str) -> Dict:
+    async def fetch_lastfm_metadata(self, artist_name: str) -> Dict:
         """Fetch metadata from Last.fm"""
         if not LASTFM_API_KEY:
             return {}
@@ -143,27 +270,25 @@ class MusicMetadataSync:
                 'format': 'json'
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = _lastfm_decoder.decode(await self._get_with_backoff(url, params))
             
-            if 'artist' not in data:
+            if data.artist is None:
                 return {}
             
-            artist = data['artist']
+            artist = data.artist
             
             metadata = {
                 'platform': 'lastfm',
                 'artist': {
-                    'name': artist['name'],
-                    'mbid': artist.get('mbid'),
-                    'listeners': int(artist['stats']['listeners']),
-                    'playcount': int(artist['stats']['playcount']),
-                    'bio': artist.get('bio', {}).get('summary', ''),
-                    'tags': [tag['name'] for tag in artist.get('tags', {}).get('tag', [])],
-                    'image': artist.get('image', [{}])[-1].get('#text'),
+                    'name': artist.name,
+                    'mbid': artist.mbid,
+                    'listeners': int(artist.stats.listeners),
+                    'playcount': int(artist.stats.playcount),
+                    'bio': artist.bio.summary,
+                    'tags': [tag.name for tag in artist.tags.tag],
+                    'image': artist.image[-1].text if artist.image else None,
                 },
-                'fetched_at': datetime.now(datetime.timezone.utc).isoformat(),
+                'fetched_at': datetime.now(timezone.utc).isoformat(),
             }
             
             logger.info("Fetched Last.fm data: %s listeners", metadata['artist']['listeners'])
@@ -173,15 +298,9 @@ class MusicMetadataSync:
             logger.error("Last.fm API error: %s", e)
             return {}
     
-    def generate_accessible_description(self, metadata: Dict) -> str:
-        """Generate accessible description using AI"""
-        if not self.anthropic:
-            return ""
-        
-        logger.info("Generating accessible description with AI")
-        
-        try:
-            prompt = f"""Generate a concise, accessible description for this musical artist suitable for screen readers and visually impaired users.
+    def _build_description_prompt(self, metadata: Dict) -> str:
+        """Build the accessible description prompt for one artist"""
+        return f"""Generate a concise, accessible description for this musical artist suitable for screen readers and visually impaired users.
 
 Artist: {metadata.get('artist', {}).get('name', 'Unknown')}
 Genres: {', '.join(metadata.get('artist', {}).get('genres', []))}
@@ -195,11 +314,19 @@ Requirements:
 - Include pronunciation guide if name is unusual
 
 Output only the description, no preamble."""
-
-            response = self.anthropic.messages.create(
-                model='claude-3-haiku-20240307',
+    
+    async def generate_accessible_description(self, metadata: Dict) -> str:
+        """Generate accessible description using AI"""
+        if not self.anthropic:
+            return ""
+        
+        logger.info("Generating accessible description with AI")
+        
+        try:
+            response = await self.anthropic.messages.create(
+                model=DESCRIPTION_MODEL,
                 max_tokens=256,
-                messages=[{'role': 'user', 'content': prompt}]
+                messages=[{'role': 'user', 'content': self._build_description_prompt(metadata)}]
             )
             
             description = response.content[0].text.strip()
@@ -210,6 +337,48 @@ Output only the description, no preamble."""
             logger.error("AI description generation failed: %s", e)
             return ""
     
+    async def generate_accessible_descriptions_bulk(self, metadatas: List[Dict]) -> List[str]:
+        """Generate accessible descriptions for many artists via the Message Batches API"""
+        if not self.anthropic or not metadatas:
+            return [""] * len(metadatas)
+        
+        logger.info("Submitting %d accessible descriptions as a message batch", len(metadatas))
+        
+        try:
+            # custom_id only allows [a-zA-Z0-9_-], so key by position rather than artist name
+            batch = await self.anthropic.messages.batches.create(
+                requests=[
+                    {
+                        'custom_id': f'artist-{index}',
+                        'params': {
+                            'model': DESCRIPTION_MODEL,
+                            'max_tokens': 256,
+                            'messages': [{'role': 'user', 'content': self._build_description_prompt(metadata)}],
+                        },
+                    }
+                    for index, metadata in enumerate(metadatas)
+                ]
+            )
+            
+            while batch.processing_status != 'ended':
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+                batch = await self.anthropic.messages.batches.retrieve(batch.id)
+            
+            descriptions = [""] * len(metadatas)
+            async for entry in await self.anthropic.messages.batches.results(batch.id):
+                if entry.result.type == 'succeeded':
+                    index = int(entry.custom_id.split('-', 1)[1])
+                    descriptions[index] = entry.result.message.content[0].text.strip()
+                else:
+                    logger.warning("Batch description %s %s", entry.custom_id, entry.result.type)
+            
+            logger.info("Generated %d accessible descriptions", sum(1 for d in descriptions if d))
+            return descriptions
+            
+        except Exception as e:
+            logger.error("AI batch description generation failed: %s", e)
+            return [""] * len(metadatas)
+    
     def merge_metadata(self, spotify_data: Dict, lastfm_data: Dict) -> Dict:
         """Merge metadata from multiple platforms"""
         merged = {
@@ -222,7 +391,7 @@ Output only the description, no preamble."""
                 'tags': [],
             },
             'accessible_description': '',
-            'synced_at': datetime.now(datetime.timezone.utc).isoformat(),
+            'synced_at': datetime.now(timezone.utc).isoformat(),
         }
         
         # Add platform-specific data
@@ -236,32 +405,89 @@ Output only the description, no preamble."""
             merged['combined']['total_listeners'] = lastfm_data.get('artist', {}).get('listeners', 0)
             merged['combined']['tags'].extend(lastfm_data.get('artist', {}).get('tags', []))
         
-        # Generate accessible description
-        merged['accessible_description'] = self.generate_accessible_description(merged['platforms'].get('spotify') or merged['platforms'].get('lastfm', {}))
-        
         return merged
     
-    def sync_artist(self, artist_name: str) -> Dict:
+    def _description_source(self, merged: Dict) -> Dict:
+        """Pick the platform metadata used to describe a merged artist"""
+        return merged['platforms'].get('spotify') or merged['platforms'].get('lastfm', {})
+    
+    async def sync_artist(self, artist_name: str, describe: bool = True) -> Dict:
         """Sync all metadata for an artist"""
         logger.info("Starting full sync for: %s", artist_name)
         
-        spotify_data = self.fetch_spotify_metadata(artist_name)
-        lastfm_data = self.fetch_lastfm_metadata(artist_name)
+        spotify_data, lastfm_data = await asyncio.gather(
+            self.fetch_spotify_metadata(artist_name),
+            self.fetch_lastfm_metadata(artist_name),
+        )
         
         merged = self.merge_metadata(spotify_data, lastfm_data)
         
+        # Generate accessible description
+        if describe:
+            merged['accessible_description'] = await self.generate_accessible_description(
+                self._description_source(merged)
+            )
+        
         logger.info("Sync complete for %s", artist_name)
         return merged
     
-    def save_metadata(self, metadata: Dict, output_file: str):
+    async def sync_artists(self, artist_names: List[str], concurrency: int = 8,
+                           batch_descriptions: bool = False) -> List[Dict]:
+        """Sync several artists concurrently, returning results in input order
+        
+        With batch_descriptions, accessible descriptions are generated in one
+        Message Batches request after all fetches finish (cheaper, but slower
+        to complete than per-artist calls).
+        """
+        logger.info("Starting batch sync for %d artists", len(artist_names))
+        semaphore = asyncio.Semaphore(concurrency)
+        completed = 0
+        
+        async def bounded_sync(artist_name: str) -> Dict:
+            nonlocal completed
+            async with semaphore:
+                merged = await self.sync_artist(artist_name, describe=not batch_descriptions)
+            completed += 1
+            logger.info("Synced %d/%d artists", completed, len(artist_names))
+            return merged
+        
+        # gather keeps results aligned with artist_names, even when a sync comes back empty
+        results = list(await asyncio.gather(*(bounded_sync(name) for name in artist_names)))
+        
+        if batch_descriptions:
+            descriptions = await self.generate_accessible_descriptions_bulk(
+                [self._description_source(merged) for merged in results]
+            )
+            for merged, description in zip(results, descriptions):
+                merged['accessible_description'] = description
+        
+        return results
+    
+    def save_metadata(self, metadata: Union[Dict, List[Dict]], output_file: str):
         """Save metadata to JSON file"""
         with open(output_file, 'w') as f:
             json.dump(metadata, f, indent=2)
         logger.info("Saved metadata to %s", output_file)
 
+async def run_sync(syncer: MusicMetadataSync, artist_names: List[str],
+                   concurrency: int, batch_descriptions: bool) -> Union[Dict, List[Dict]]:
+    """Sync one or more artists and release the shared clients afterwards"""
+    try:
+        if len(artist_names) == 1:
+            return await syncer.sync_artist(artist_names[0])
+        return await syncer.sync_artists(artist_names, concurrency=concurrency,
+                                         batch_descriptions=batch_descriptions)
+    finally:
+        await syncer.close()
+
 def main():
     parser = argparse.ArgumentParser(description='Sync music metadata across platforms')
-    parser.add_argument('--artist', help='Artist name to sync')
+    parser.add_argument('--artist', action='append',
+                        help='Artist name to sync (repeat to sync several artists)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Maximum artists synced at once')
+    parser.add_argument('--batch-descriptions', action='store_true',
+                        help='Generate descriptions for multiple artists via the Anthropic Message Batches API')
     parser.add_argument('--platform', choices=['spotify', 'lastfm', 'all'], default='all')
     parser.add_argument('--output', default='metadata.json', help='Output file')
     parser.add_argument('--generate-accessible-descriptions', action='store_true',
@@ -273,13 +499,16 @@ def main():
         print("Error: --artist required")
         return
     
+    if args.batch_descriptions and len(args.artist) == 1:
+        logger.warning("--batch-descriptions only applies when syncing several artists; ignoring it")
+    
     syncer = MusicMetadataSync()
-    metadata = syncer.sync_artist(args.artist)
+    metadata = asyncio.run(run_sync(syncer, args.artist, args.concurrency, args.batch_descriptions))
     syncer.save_metadata(metadata, args.output)
     
-    print(f"\n✓ Sync complete for {args.artist}")
+    print(f"\n✓ Sync complete for {', '.join(args.artist)}")
     print(f"  Output: {args.output}")
-    if metadata.get('accessible_description'):
+    if isinstance(metadata, dict) and metadata.get('accessible_description'):
         print(f"  Accessible description: {metadata['accessible_description']}")
 
 if __name__ == '__main__':
@@ -0,0 +1,296 @@
+"""
+Tests for insurance_lead_import.py
+
+Usage:
+    python -m unittest discover -s automation/tests
+"""
+
+import base64
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import insurance_lead_import  # noqa: E402
+
+
+class RateLimitHandler(BaseHTTPRequestHandler):
+    """Answers /limited with 429 + Retry-After: 1 and everything else with 200"""
+    hits = {}
+
+    def do_GET(self):
+        RateLimitHandler.hits[self.path] = RateLimitHandler.hits.get(self.path, 0) + 1
+        if self.path == '/limited':
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RateLimitedAdapterTest(unittest.TestCase):
+
+    def setUp(self):
+        RateLimitHandler.hits = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RateLimitHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+        self.session = insurance_lead_import.create_http_session()
+        self.adapter = self.session.get_adapter(self.base_url)
+        self.adapter.rate_limit_retries = 0
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_429_is_returned_to_the_adapter_not_retried_by_urllib3(self):
+        response = self.session.get(f"{self.base_url}/limited", timeout=5)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(RateLimitHandler.hits['/limited'], 1)
+        self.assertIn(f"127.0.0.1:{self.server.server_port}", self.adapter._blocked_until)
+
+    def test_next_request_to_rate_limited_host_waits_for_retry_after(self):
+        self.session.get(f"{self.base_url}/limited", timeout=5)
+
+        started = time.monotonic()
+        response = self.session.get(f"{self.base_url}/ok", timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.8)
+
+    def test_429_is_retried_after_the_cooldown(self):
+        self.adapter.rate_limit_retries = 1
+
+        started = time.monotonic()
+        response = self.session.get(f"{self.base_url}/limited", timeout=5)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(RateLimitHandler.hits['/limited'], 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.8)
+
+
+class RecordingAuditLogger:
+    """Collects audit events in memory instead of writing the JSONL file"""
+
+    def __init__(self):
+        self.events = []
+
+    def log_event(self, event_type, lead_id, details):
+        self.events.append((event_type, lead_id, details))
+
+    def flush(self):
+        pass
+
+
+class ProcessLeadsTest(unittest.TestCase):
+
+    def setUp(self):
+        # Skip __init__: no database, S3 or network in unit tests
+        self.importer = insurance_lead_import.LeadImporter.__new__(insurance_lead_import.LeadImporter)
+        self.importer.encryption = insurance_lead_import.HIPAACompliantEncryption(
+            hash_key=insurance_lead_import.Fernet.generate_key()
+        )
+        self.importer.audit = RecordingAuditLogger()
+        self.importer.encrypt_pool = ThreadPoolExecutor(max_workers=2)
+        self.importer.s3_pool = ThreadPoolExecutor(max_workers=2)
+        self.importer.seen_email_hashes = set()
+        self.stored = []
+        self.importer._store_leads_bulk = lambda leads, email_hashes: self.stored.extend(leads)
+        self.importer._archive_to_s3 = lambda source, date, leads: 'shard-key'
+
+    def tearDown(self):
+        self.importer.encrypt_pool.shutdown()
+        self.importer.s3_pool.shutdown()
+
+    def make_lead(self, lead_id):
+        return insurance_lead_import.InsuranceLead(
+            lead_id=lead_id,
+            source='csv',
+            first_name='Test',
+            last_name='Lead',
+            email=f'{lead_id}@example.com',
+            phone='555-0100',
+            consent_given=True,
+            tcpa_compliant=True
+        )
+
+    def test_failing_source_audits_and_releases_pending_batch(self):
+        def leads():
+            yield self.make_lead('lead-1')
+            raise ValueError('source broke')
+
+        with self.assertRaises(ValueError):
+            self.importer.process_leads(leads())
+
+        self.assertEqual(self.stored, [])
+        self.assertEqual(self.importer.seen_email_hashes, set())
+        self.assertIn(
+            ('lead_import_failed', 'lead-1', {'error': 'source broke'}),
+            self.importer.audit.events
+        )
+
+        # The lead was never stored, so a retry must not reject it as a duplicate
+        self.assertEqual(self.importer.process_leads([self.make_lead('lead-1')]), 1)
+
+    def events_for(self, event_type):
+        return {lead_id for event, lead_id, _ in self.importer.audit.events if event == event_type}
+
+    def test_failed_store_stage_accounts_for_every_queued_batch(self):
+        # Stored batches can no longer be archived, which kills the store stage
+        self.importer.s3_pool.shutdown()
+        lead_ids = {f'lead-{n}' for n in range(6)}
+
+        with mock.patch.object(insurance_lead_import, 'LEAD_BATCH_SIZE', 1):
+            with self.assertRaises(RuntimeError):
+                self.importer.process_leads([self.make_lead(lead_id) for lead_id in sorted(lead_ids)])
+
+        imported = self.events_for('lead_imported')
+        failed = self.events_for('lead_import_failed')
+        self.assertEqual(imported, {lead.lead_id for lead in self.stored})
+        self.assertEqual(imported | failed, lead_ids)
+        self.assertFalse(imported & failed)
+        # Only stored leads keep their hash, the rest may be imported by a later run
+        self.assertEqual(len(self.importer.seen_email_hashes), len(imported))
+
+    def test_failed_archive_stage_still_audits_queued_stored_batches(self):
+        audit = self.importer.audit
+        log_event = audit.log_event
+
+        def fail_first_import(event_type, lead_id, details):
+            if event_type == 'lead_imported' and lead_id == 'lead-0':
+                raise OSError('audit log unavailable')
+            log_event(event_type, lead_id, details)
+
+        audit.log_event = fail_first_import
+
+        with mock.patch.object(insurance_lead_import, 'LEAD_BATCH_SIZE', 1):
+            with self.assertRaises(OSError):
+                self.importer.process_leads([self.make_lead(f'lead-{n}') for n in range(3)])
+
+        self.assertEqual(len(self.stored), 3)
+        self.assertEqual(self.events_for('lead_imported'), {'lead-1', 'lead-2'})
+
+    def test_bad_csv_row_fails_the_import(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('lead_id,first_name,last_name,email,phone,consent,tcpa_consent\n')
+            f.write('lead-1,Test,Lead,lead-1@example.com,555-0100,yes,yes\n')
+            f.write(',Test,Lead,lead-2@example.com,555-0100,yes,yes\n')
+        self.addCleanup(os.unlink, f.name)
+
+        def broken_lead_id():
+            raise ValueError('bad row')
+
+        self.importer._generate_lead_id = broken_lead_id
+
+        with self.assertRaises(ValueError):
+            self.importer.process_leads(self.importer.import_from_csv(f.name))
+
+        self.assertEqual(self.stored, [])
+        self.assertIn(
+            ('lead_import_failed', 'lead-1', {'error': 'bad row'}),
+            self.importer.audit.events
+        )
+
+
+class HIPAACompliantEncryptionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.key = insurance_lead_import.Fernet.generate_key()
+        self.hash_key = insurance_lead_import.Fernet.generate_key()
+
+    def test_encrypt_round_trips_through_decrypt(self):
+        encryption = insurance_lead_import.HIPAACompliantEncryption(self.key, self.hash_key)
+
+        self.assertEqual(encryption.decrypt(encryption.encrypt('555-0100')), '555-0100')
+        self.assertEqual(encryption.encrypt(''), '')
+        self.assertEqual(encryption.decrypt(''), '')
+
+    def test_encrypt_batch_round_trips_through_decrypt(self):
+        encryption = insurance_lead_import.HIPAACompliantEncryption(self.key, self.hash_key)
+        plaintexts = ['lead@example.com', '', '1950-01-01', 'lead@example.com']
+
+        ciphertexts = encryption.encrypt_batch(plaintexts)
+
+        self.assertEqual([encryption.decrypt(c) for c in ciphertexts], plaintexts)
+        self.assertEqual(ciphertexts[1], '')
+        self.assertNotEqual(ciphertexts[0], ciphertexts[3])  # fresh nonce per value
+
+    def test_legacy_fernet_tokens_still_decrypt(self):
+        encryption = insurance_lead_import.HIPAACompliantEncryption(self.key, self.hash_key)
+        token = encryption.legacy_cipher.encrypt(b'555-0100').decode()
+
+        self.assertEqual(encryption.decrypt(token), '555-0100')
+
+    def test_aes_key_is_derived_not_the_raw_fernet_key(self):
+        encryption = insurance_lead_import.HIPAACompliantEncryption(self.key, self.hash_key)
+        raw_key = base64.urlsafe_b64decode(self.key)
+        token = encryption.encrypt('555-0100')
+
+        raw = base64.b64decode(token)
+        with self.assertRaises(insurance_lead_import.InvalidTag):
+            insurance_lead_import.AESGCM(raw_key).decrypt(raw[:12], raw[12:], None)
+
+    def test_hash_pii_is_keyed(self):
+        for algorithm in ('blake3', 'sha256'):
+            encryption = insurance_lead_import.HIPAACompliantEncryption(
+                self.key, self.hash_key, hash_algorithm=algorithm
+            )
+            other_key = insurance_lead_import.HIPAACompliantEncryption(
+                self.key, insurance_lead_import.Fernet.generate_key(), hash_algorithm=algorithm
+            )
+
+            digest = encryption.hash_pii('lead@example.com')
+            self.assertEqual(digest, encryption.hash_pii('lead@example.com'))
+            self.assertNotEqual(digest, other_key.hash_pii('lead@example.com'))
+            self.assertNotEqual(digest, insurance_lead_import.hashlib.sha256(b'lead@example.com').hexdigest())
+
+    def test_hash_key_must_differ_from_encryption_key(self):
+        with self.assertRaises(ValueError):
+            insurance_lead_import.HIPAACompliantEncryption(self.key, self.key)
+
+    def test_missing_hash_key_fails_fast(self):
+        with self.assertRaises(ValueError):
+            insurance_lead_import.HIPAACompliantEncryption(self.key, None)
+
+
+class ArchiveShardTest(unittest.TestCase):
+
+    def test_shard_does_not_contain_email_hash(self):
+        importer = insurance_lead_import.LeadImporter.__new__(insurance_lead_import.LeadImporter)
+        importer._json_encoder = insurance_lead_import.msgspec.json.Encoder()
+        uploads = []
+
+        class RecordingS3Client:
+            def put_object(self, **kwargs):
+                uploads.append(kwargs)
+
+        importer.s3_client = RecordingS3Client()
+        lead = insurance_lead_import.InsuranceLead(
+            lead_id='lead-1', source='csv', first_name='Test', last_name='Lead',
+            email='ciphertext', phone='ciphertext'
+        )
+
+        importer._archive_to_s3('csv', '2025-11-14', [lead])
+
+        record = insurance_lead_import.msgspec.json.decode(gzip.decompress(uploads[0]['Body']))
+        self.assertEqual(record['lead_id'], 'lead-1')
+        self.assertNotIn('email_hash', record)
+
+
+if __name__ == '__main__':
+    unittest.main()